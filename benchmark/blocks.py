@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import numpy as np
+import tempfile
+
+from benchmark.common import measure, write
+from datatype.signal import Signal
+from pathlib import Path
+
+
+SIZE = 2**16
+
+
+def load(path: Path) -> None:
+    signal = Signal(path)
+
+    # Load the whole recording, then walk it in blocks
+    signal.data = np.asarray(signal.data)
+
+    for block in signal.blocks(SIZE):
+        np.sqrt(np.mean(np.square(block)))
+
+
+def stream(path: Path) -> None:
+    signal = Signal(path)
+
+    for block in signal.blocks(SIZE):
+        np.sqrt(np.mean(np.square(block)))
+
+
+MODE = {
+    'load': load,
+    'blocks': stream,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', nargs='+', type=int, default=[60, 600])
+    arguments = parser.parse_args()
+
+    print(
+        f"{'format':<8}{'seconds':>8}{'mode':>8}"
+        f"{'time (s)':>12}{'x realtime':>12}{'peak (MiB)':>12}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in ('.wav', '.flac'):
+            for seconds in arguments.seconds:
+                path = Path(directory).joinpath(f"{seconds}{suffix}")
+                write(path, seconds)
+
+                for mode, function in MODE.items():
+                    result = measure(function, path)
+
+                    if result is None:
+                        print(f"{suffix:<8}{seconds:>8}{mode:>8}{'killed':>12}")
+                        continue
+
+                    elapsed, peak = result
+
+                    print(
+                        f"{suffix:<8}{seconds:>8}{mode:>8}"
+                        f"{elapsed:>12.2f}{seconds / elapsed:>12.0f}"
+                        f"{peak:>12.0f}"
+                    )
+
+
+if __name__ == '__main__':
+    main()
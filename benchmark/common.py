@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import multiprocessing
+import numpy as np
+import resource
+import soundfile as sf
+import sys
+import time
+
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from multiprocessing.queues import Queue
+
+
+RATE = 44100
+
+# The length of each chunk of a synthetic recording, in seconds
+CHUNK = 10
+
+SETTINGS = Path(__file__).parent.parent.joinpath('settings')
+
+
+def synthesize(
+    seconds: float,
+    rate: int = RATE,
+    channels: int = 1,
+    seed: int = 0
+) -> np.ndarray:
+    # A 3 kHz tone every 250 ms, over a noise floor
+    rng = np.random.default_rng(seed)
+    length = int(seconds * rate)
+
+    data = rng.normal(0, 0.01, (channels, length)).astype('float32')
+
+    t = np.arange(int(0.06 * rate)) / rate
+    tone = (0.5 * np.sin(2 * np.pi * 3000 * t)).astype('float32')
+
+    for start in range(0, length - tone.size, int(0.25 * rate)):
+        data[:, start:start + tone.size] += tone
+
+    return data[0] if channels == 1 else data
+
+
+def write(
+    path: Path,
+    seconds: float,
+    rate: int = RATE,
+    subtype: str = 'PCM_16'
+) -> Path:
+    # Write in chunks, as libsndfile struggles with one long Vorbis write
+    with sf.SoundFile(
+        path,
+        mode='w',
+        samplerate=rate,
+        channels=1,
+        subtype=subtype
+    ) as file:
+        for start in range(0, int(seconds), CHUNK):
+            chunk = min(CHUNK, seconds - start)
+            file.write(synthesize(chunk, rate, seed=start))
+
+    return path
+
+
+STATUS = Path('/proc/self/status')
+
+
+def _status(key: str) -> float:
+    # A field of the process status, in MiB
+    for line in STATUS.read_text().splitlines():
+        if line.startswith(f"{key}:"):
+            return int(line.split()[1]) / 2**10
+
+    message = f"{key} is not in {STATUS}"
+    raise KeyError(message)
+
+
+def peak() -> float:
+    # The peak resident set size, in MiB
+    if STATUS.exists():
+        return _status('VmHWM')
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 2**20 if sys.platform == 'darwin' else 2**10
+    return usage / scale
+
+
+def resident() -> float:
+    # Reset the peak to the current resident set size, where Linux allows
+    if STATUS.exists():
+        Path('/proc/self/clear_refs').write_text('5')
+        return _status('VmRSS')
+
+    return peak()
+
+
+def _child(
+    queue: Queue,
+    function: Callable[..., Any],
+    args: tuple[Any, ...]
+) -> None:
+    before = resident()
+
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+
+    queue.put((elapsed, peak() - before))
+
+
+def measure(
+    function: Callable[..., Any],
+    *args: Any
+) -> tuple[float, float] | None:
+    # Run in a fresh process, so that the peak resident set size is only
+    # from this call and an out-of-memory kill is reported, not fatal
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+
+    process = context.Process(target=_child, args=(queue, function, args))
+    process.start()
+    process.join()
+
+    if process.exitcode != 0:
+        return None
+
+    return queue.get()
+
+
+def best(function: Callable[..., Any], *args: Any, repeat: int = 3) -> float:
+    timing = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timing.append(time.perf_counter() - start)
+
+    return min(timing)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import numpy as np
+import tempfile
+
+from benchmark.common import best, write
+from datatype.signal import FORMAT, Signal
+from pathlib import Path
+
+
+SUBTYPE = {
+    '.wav': 'PCM_16',
+    '.flac': 'PCM_16',
+    '.ogg': 'VORBIS',
+}
+
+
+def decode(path: Path, decoder: str) -> None:
+    signal = Signal(path, decoder)
+
+    # A memory-mapped recording is only converted when it is read
+    np.asarray(signal.data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', nargs='+', type=int, default=[10, 60, 300])
+    parser.add_argument('--repeat', type=int, default=3)
+    arguments = parser.parse_args()
+
+    print(
+        f"{'format':<8}{'seconds':>8}{'decoder':>12}"
+        f"{'time (s)':>12}{'x realtime':>12}{'MiB/s':>10}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix, subtype in SUBTYPE.items():
+            # The memory-mapped decoder is opt-in, and only reads WAV
+            decoders = FORMAT[suffix]
+
+            if suffix == '.wav':
+                decoders = ('mmap', *decoders)
+
+            for seconds in arguments.seconds:
+                path = Path(directory).joinpath(f"{seconds}{suffix}")
+                write(path, seconds, subtype=subtype)
+
+                size = path.stat().st_size / 2**20
+
+                for decoder in decoders:
+                    elapsed = best(
+                        decode,
+                        path,
+                        decoder,
+                        repeat=arguments.repeat
+                    )
+
+                    print(
+                        f"{suffix:<8}{seconds:>8}{decoder:>12}"
+                        f"{elapsed:>12.3f}{seconds / elapsed:>12.0f}"
+                        f"{size / elapsed:>10.1f}"
+                    )
+
+
+if __name__ == '__main__':
+    main()
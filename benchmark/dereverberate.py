@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import numpy as np
+
+from benchmark.common import RATE, SETTINGS, measure, synthesize
+from datatype.settings import Settings
+from datatype.signal import Signal
+from scipy.signal import fftconvolve
+
+
+def reverberate(seconds: float, decay: float = 0.3) -> np.ndarray:
+    # Convolve with an exponentially decaying noise, one per channel
+    rng = np.random.default_rng(0)
+    length = int(decay * RATE)
+
+    response = rng.standard_normal((2, length)) * np.exp(
+        -6 * np.arange(length) / length
+    )
+
+    data = synthesize(seconds, channels=2)
+    data = fftconvolve(data, response, axes=-1)[:, :data.shape[-1]]
+
+    return (data / np.abs(data).max()).astype('float32')
+
+
+def run(data: np.ndarray, mode: str) -> None:
+    signal = Signal()
+    signal.data = data
+    signal.rate = RATE
+
+    settings = Settings.from_file(
+        SETTINGS.joinpath('dereverberate.json')
+    )
+
+    settings.mode = mode
+    signal.dereverberate(settings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', nargs='+', type=int, default=[5, 10, 20, 40])
+    arguments = parser.parse_args()
+
+    print(
+        f"{'seconds':>8}{'mode':>8}{'time (s)':>12}"
+        f"{'s per s':>10}{'peak (MiB)':>12}"
+    )
+
+    for seconds in arguments.seconds:
+        data = reverberate(seconds)
+
+        for mode in ('online', 'batch'):
+            result = measure(run, data, mode)
+
+            if result is None:
+                print(f"{seconds:>8}{mode:>8}{'killed':>12}")
+                continue
+
+            elapsed, peak = result
+
+            print(
+                f"{seconds:>8}{mode:>8}{elapsed:>12.2f}"
+                f"{elapsed / seconds:>10.3f}{peak:>12.0f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import argparse
+import numpy as np
+
+from benchmark.common import best
+from datatype import fft
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    arguments = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'n_fft':>6}{'backend':>10}{'dtype':>10}{'time (ms)':>12}")
+
+    for n_fft in (256, 512, 1024, 2048):
+        frames = rng.standard_normal((arguments.frames, n_fft))
+
+        for backend in fft.BACKEND:
+            for dtype in ('float32', 'float64'):
+                x = frames.astype(dtype)
+
+                elapsed = best(
+                    lambda x=x, backend=backend: fft.rfft(
+                        x,
+                        backend=backend,
+                        workers=arguments.workers
+                    ),
+                    repeat=arguments.repeat
+                )
+
+                print(
+                    f"{n_fft:>6}{backend:>10}{dtype:>10}"
+                    f"{elapsed * 1000:>12.1f}"
+                )
+
+    # A prime length, with and without zero-padding to a fast length
+    x = rng.standard_normal(1000003).astype('float32')
+
+    print(f"\n{'length':>8}{'fast':>8}{'time (ms)':>12}")
+
+    for fast in (False, True):
+        elapsed = best(
+            lambda fast=fast: fft.rfft(x, fast=fast),
+            repeat=arguments.repeat
+        )
+
+        print(f"{x.size:>8}{fast!s:>8}{elapsed * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
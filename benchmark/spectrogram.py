@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import librosa
+import numpy as np
+
+from benchmark.common import RATE, SETTINGS, measure
+from datatype.settings import Settings
+from datatype.signal import Signal
+from datatype.spectrogram import create_spectrogram
+from scipy.signal import lfilter
+
+
+def legacy(signal: Signal, settings: Settings) -> np.ndarray:
+    # The float64 chain that create_spectrogram replaced
+    data = lfilter([1, -settings.preemphasis], [1], signal.data)
+
+    hop_length = int(settings.hop_length_ms / 1000 * signal.rate)
+    win_length = int(settings.win_length_ms / 1000 * signal.rate)
+
+    data = librosa.stft(
+        y=data,
+        n_fft=settings.n_fft,
+        hop_length=hop_length,
+        win_length=win_length
+    )
+
+    data = 20 * np.log10(
+        np.maximum(1e-5, np.abs(data))
+    ) - settings.ref_level_db
+
+    return np.clip(
+        (data - settings.min_level_db) / -settings.min_level_db,
+        0,
+        1
+    )
+
+
+PATH = {
+    'float64': legacy,
+    'float32': create_spectrogram,
+}
+
+
+def run(path: str, seconds: float) -> None:
+    rng = np.random.default_rng(0)
+
+    signal = Signal()
+    signal.data = rng.standard_normal(int(seconds * RATE), dtype='float32')
+    signal.rate = RATE
+
+    settings = Settings.from_file(
+        SETTINGS.joinpath('spectrogram.json')
+    )
+
+    PATH[path](signal, settings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', nargs='+', type=float, default=[2, 10])
+    arguments = parser.parse_args()
+
+    print(f"{'minutes':>8}{'path':>10}{'time (s)':>12}{'peak (MiB)':>12}")
+
+    for minutes in arguments.minutes:
+        for path in PATH:
+            # Each run is in a child process, which may be killed
+            result = measure(run, path, minutes * 60)
+
+            if result is None:
+                print(f"{minutes:>8g}{path:>10}{'killed':>12}{'-':>12}")
+                continue
+
+            elapsed, peak = result
+            print(f"{minutes:>8g}{path:>10}{elapsed:>12.2f}{peak:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+
+from functools import lru_cache
+from scipy.signal import butter, sosfilt, sosfiltfilt
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+
+@lru_cache(maxsize=32)
+def design(
+    rate: int,
+    lowcut: float,
+    highcut: float,
+    order: int = 5
+) -> npt.NDArray:
+    if highcut > int(rate / 2):
+        highcut = int(rate / 2)
+
+    nyquist = 0.5 * rate
+    low = lowcut / nyquist
+    high = highcut / nyquist
+
+    sos = butter(
+        order,
+        [low, high],
+        btype='band',
+        output='sos'
+    )
+
+    return sos.astype('float32')
+
+
+class Bandpass:
+    def __init__(
+        self,
+        rate: int,
+        lowcut: float,
+        highcut: float,
+        order: int = 5,
+        zero_phase: bool = False
+    ):
+        self.sos = design(rate, lowcut, highcut, order)
+        self.state = None
+        self.zero_phase = zero_phase
+
+    def __call__(self, data: npt.NDArray) -> npt.NDArray:
+        data = np.asarray(data, dtype='float32')
+
+        # A zero-phase filter needs the whole signal and cannot stream
+        if self.zero_phase:
+            data = sosfiltfilt(self.sos, data, axis=-1)
+            return data.astype('float32', copy=False)
+
+        if self.state is None:
+            sections, _ = self.sos.shape
+            shape = (sections, *data.shape[:-1], 2)
+            self.state = np.zeros(shape, dtype='float32')
+
+        # The state is carried over, so consecutive blocks must not overlap
+        data, self.state = sosfilt(
+            self.sos,
+            data,
+            axis=-1,
+            zi=self.state
+        )
+
+        return data
+
+    def reset(self) -> None:
+        self.state = None
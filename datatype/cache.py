@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from datatype.settings import Settings
+    from datatype.signal import Signal
+    from pathlib import Path
+
+
+# The settings that change the output of a spectrogram
+PARAMETERS = (
+    'n_fft',
+    'hop_length_ms',
+    'win_length_ms',
+    'ref_level_db',
+    'min_level_db',
+    'preemphasis',
+)
+
+
+class SpectrogramCache:
+    def __init__(
+        self,
+        path: Path | None = None,
+        budget: int = 2 ** 28,
+        limit: int = 2 ** 30
+    ):
+        self.budget = budget
+        self.files = OrderedDict()
+        self.limit = limit
+        self.memory = OrderedDict()
+        self.path = path
+        self.size = 0
+        self.usage = 0
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            # The files of earlier sessions, from the least recently used
+            files = sorted(
+                self.path.glob('*.npy'),
+                key=lambda file: file.stat().st_mtime
+            )
+
+            for file in files:
+                self.files[file.stem] = file.stat().st_size
+                self.usage = self.usage + self.files[file.stem]
+
+            self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.memory or self._file(key) is not None
+
+    def _evict(self) -> None:
+        while self.usage > self.limit:
+            key, size = self.files.popitem(last=False)
+            self.usage = self.usage - size
+
+            path = self.path.joinpath(key + '.npy')
+            path.unlink(missing_ok=True)
+
+    def _file(self, key: str) -> Path | None:
+        if self.path is None or key not in self.files:
+            return None
+
+        path = self.path.joinpath(key + '.npy')
+        return path if path.exists() else None
+
+    def _insert(self, key: str, spectrogram: npt.NDArray) -> None:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+
+        # Entries that exceed the budget on their own are only kept on disk
+        if spectrogram.nbytes > self.budget:
+            return
+
+        self.memory[key] = spectrogram
+        self.size = self.size + spectrogram.nbytes
+
+        while self.size > self.budget:
+            _, evicted = self.memory.popitem(last=False)
+            self.size = self.size - evicted.nbytes
+
+    @staticmethod
+    def key(
+        signal: Signal,
+        settings: Settings,
+        strategy: str = 'linear',
+        parameters: tuple[str, ...] = PARAMETERS
+    ) -> str:
+        data = np.ascontiguousarray(signal.data)
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(data)
+
+        parameters = (
+            strategy,
+            signal.rate,
+            data.dtype.str,
+            data.shape,
+            *[getattr(settings, name) for name in parameters]
+        )
+
+        digest.update(
+            repr(parameters).encode()
+        )
+
+        return digest.hexdigest()
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.size = 0
+
+    def get(self, key: str) -> npt.NDArray | None:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        path = self._file(key)
+
+        if path is None:
+            return None
+
+        spectrogram = np.load(path)
+        spectrogram.flags.writeable = False
+
+        # The modification time keeps the order for the next session
+        self.files.move_to_end(key)
+        path.touch()
+
+        self._insert(key, spectrogram)
+        return spectrogram
+
+    def put(self, key: str, spectrogram: npt.NDArray) -> None:
+        spectrogram = np.asarray(spectrogram)
+        spectrogram.flags.writeable = False
+
+        self._insert(key, spectrogram)
+
+        if self.path is None or self._file(key) is not None:
+            return
+
+        # Entries that exceed the limit on their own are not written
+        if spectrogram.nbytes > self.limit:
+            return
+
+        # A file that was removed elsewhere is written again
+        if key in self.files:
+            self.usage = self.usage - self.files.pop(key)
+
+        path = self.path.joinpath(key + '.npy')
+        np.save(path, spectrogram)
+
+        self.files[key] = path.stat().st_size
+        self.usage = self.usage + self.files[key]
+
+        self._evict()
@@ -84,13 +84,18 @@ class Dataloader:
                 .joinpath(self.current.recording)
             )
 
-            signal = Signal(path)
+            # The decoder is chosen by file type unless the settings name one
+            decoder = getattr(self.settings(), 'decoder', None)
+            signal = Signal(path, decoder)
 
             path = self.parser.settings.joinpath('dereverberate.json')
             dereverberate = Settings.from_file(path)
 
             callback = {}
 
+            # The analysis expects a mono signal, so this runs last
+            callback['downmix'] = partial(signal.downmix)
+
             if settings.bandpass_filter:
                 callback['filter'] = partial(
                     signal.filter,
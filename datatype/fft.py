@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import scipy.fft
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+
+class Backend(ABC):
+    @abstractmethod
+    def rfft(
+        self,
+        x: npt.NDArray,
+        n: int,
+        axis: int = -1,
+        workers: int | None = None
+    ) -> npt.NDArray:
+        raise NotImplementedError
+
+
+class NumpyFFT(Backend):
+    def rfft(
+        self,
+        x: npt.NDArray,
+        n: int,
+        axis: int = -1,
+        _workers: int | None = None
+    ) -> npt.NDArray:
+        # NumPy is single-threaded, so the number of workers is ignored
+        return np.fft.rfft(x, n=n, axis=axis)
+
+
+class ScipyFFT(Backend):
+    def rfft(
+        self,
+        x: npt.NDArray,
+        n: int,
+        axis: int = -1,
+        workers: int | None = None
+    ) -> npt.NDArray:
+        return scipy.fft.rfft(x, n=n, axis=axis, workers=workers)
+
+
+BACKEND = {
+    'numpy': NumpyFFT(),
+    'scipy': ScipyFFT(),
+}
+
+
+def length(n: int, fast: bool = False) -> int:
+    # Zero-pad to a length with only small prime factors
+    if fast:
+        return scipy.fft.next_fast_len(n, real=True)
+
+    return n
+
+
+def rfft(
+    x: npt.NDArray,
+    n: int | None = None,
+    axis: int = -1,
+    *,
+    workers: int | None = None,
+    fast: bool = False,
+    backend: str = 'scipy'
+) -> npt.NDArray:
+    x = np.asarray(x)
+
+    # Integer samples are transformed in float32, not float64
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype('float32')
+
+    if n is None:
+        n = x.shape[axis]
+
+    n = length(n, fast)
+    return BACKEND[backend].rfft(x, n, axis, workers)
+
+
+def rfftfreq(n: int, d: float = 1.0, fast: bool = False) -> npt.NDArray:
+    n = length(n, fast)
+    return scipy.fft.rfftfreq(n, d)
@@ -2,15 +2,16 @@ from __future__ import annotations
 
 import numpy as np
 
-from datatype.spectrogram import Segment, Spectrogram
-from scipy import ndimage
+from datatype.signal import Signal
+from datatype.spectrogram import Plan, Segment
+from itertools import chain
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     import numpy.typing as npt
 
+    from collections.abc import Iterator
     from datatype.settings import Settings
-    from datatype.signal import Signal
     from typing_extensions import Any
 
 
@@ -20,89 +21,190 @@ class DynamicThresholdSegmentation:
         self.settings = settings
         self.signal = signal
 
+    def _accept(self, vocal_envelope: npt.NDArray, fft: float) -> bool:
+        threshold = self.settings.silence_threshold
+
+        onset, offset = self._calculate_onset_offset(
+            vocal_envelope > threshold
+        ) / fft
+
+        silence_onset, silence_offset = self._calculate_onset_offset(
+            vocal_envelope <= threshold
+        ) / fft
+
+        # A long enough silence and no overly long vocalization
+        return (
+            np.max(silence_offset - silence_onset) >
+            self.settings.min_silence_for_spec and
+            np.max(offset - onset) < self.settings.max_vocal_for_spec
+        )
+
     def _calculate_onset_offset(self, signal: npt.NDArray) -> npt.NDArray:
         signal = signal > self.settings.silence_threshold
-        elements, nelements = ndimage.label(signal)
 
-        zero = [0]
+        # Each run starts at a rise and ends at a fall of the padded mask
+        padded = np.zeros(len(signal) + 2, dtype='int8')
+        padded[1:-1] = signal
+
+        difference = np.diff(padded)
+
+        onset = np.flatnonzero(difference == 1)
+        offset = np.flatnonzero(difference == -1)
+
+        if len(onset) == 0:
+            zero = [0]
 
-        if nelements == 0:
             return np.array(
                 [zero, zero]
             )
 
-        onset, offset = np.array(
-            [
-                np.where(elements == element)[0][np.array([0, -1])] +
-                np.array([0, 1])
-                for element in np.unique(elements)
-                if element != 0
-            ]
-        ).T
-
         return np.array([onset, offset])
 
-    def start(self) -> dict[str, Any]:
-        # Make a copy of the original spectrogram
-        segment = Segment(self.signal, self.settings)
+    def _envelope(
+        self,
+        decibel: npt.NDArray,
+        middle: npt.NDArray,
+        min_level_db: float,
+        out: npt.NDArray | None = None
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        sample = self._normalize(decibel, min_level_db, out)
 
-        spectrogram = Spectrogram()
-        spectrogram.strategy = segment
-        original = spectrogram.generate()
+        # The median of each row, from its normalized middle elements
+        median = np.mean(
+            self._normalize(middle, min_level_db),
+            axis=1
+        )
 
-        fft = self.signal.rate / int(
-            self.settings.hop_length_ms / 1000 * self.signal.rate
+        # Subtract the median
+        sample -= median.reshape(
+            (len(sample), 1)
         )
 
-        if self.settings.spectral_range is not None:
-            x, _ = np.shape(original)
+        sample[sample < 0] = 0
 
-            resolution = (self.signal.rate / 2) / x
-            lower, upper = self.settings.spectral_range
+        # Get the vocal envelope
+        vocal_envelope = np.max(sample, axis=0) * np.sqrt(
+            np.mean(sample, axis=0)
+        )
 
-            original = original[
-                int(lower / resolution):
-                int(upper / resolution),
-                :,
-            ]
+        # Normalize envelope
+        vocal_envelope = vocal_envelope / np.max(vocal_envelope)
 
-        # Possible thresholding configurations starting at the highest
-        configuration = np.arange(
-            self.settings.min_level_db,
-            self.settings.min_level_db_floor,
-            self.settings.db_delta
-        )
+        return sample, vocal_envelope
+
+    def _middle(self, decibel: npt.NDArray) -> npt.NDArray:
+        _, length = decibel.shape
+        half = length // 2
+
+        # The one or two elements of each row that its median is taken from
+        kth = [half] if length % 2 else [half - 1, half]
+        return np.partition(decibel, kth, axis=1)[:, kth]
+
+    def _normalize(
+        self,
+        decibel: npt.NDArray,
+        min_level_db: float,
+        out: npt.NDArray | None = None
+    ) -> npt.NDArray:
+        if out is None:
+            out = np.empty_like(decibel)
+
+        # Normalize the decibels in place, as the spectrogram would
+        sample = np.subtract(decibel, min_level_db, out=out)
+        sample /= -min_level_db
+
+        np.clip(sample, 0, 1, out=sample)
+        return sample
+
+    def _search(
+        self,
+        decibel: npt.NDArray,
+        configuration: npt.NDArray,
+        fft: float
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        # The normalization is monotonic, so the order of each row is kept
+        middle = self._middle(decibel)
+        sample = np.empty_like(decibel)
+
+        search = getattr(self.settings, 'search', None) or 'linear'
+
+        low = 0
+        high = len(configuration) - 1
+
+        evaluated = None
 
-        for _, min_level_db in enumerate(configuration):
-            segment.settings.min_level_db = min_level_db
-            sample = spectrogram.generate()
+        while low <= high:
+            # Bisect, if a threshold is accepted whenever a lower one is
+            index = (low + high) // 2 if search == 'bisect' else low
 
-            # Subtract the median
-            sample = sample - np.median(sample, axis=1).reshape(
-                (len(sample), 1)
+            sample, vocal_envelope = self._envelope(
+                decibel,
+                middle,
+                configuration[index],
+                out=sample
             )
 
-            sample[sample < 0] = 0
+            evaluated = index
 
-            # Get the vocal envelope
-            vocal_envelope = np.max(sample, axis=0) * np.sqrt(
-                np.mean(sample, axis=0)
+            if self._accept(vocal_envelope, fft):
+                if search != 'bisect':
+                    return sample, vocal_envelope
+
+                high = index - 1
+            else:
+                low = index + 1
+
+        # Otherwise, settle for the highest threshold
+        index = min(low, len(configuration) - 1)
+
+        if index != evaluated:
+            sample, vocal_envelope = self._envelope(
+                decibel,
+                middle,
+                configuration[index],
+                out=sample
             )
 
-            # Normalize envelope
-            vocal_envelope = vocal_envelope / np.max(vocal_envelope)
+        return sample, vocal_envelope
+
+    def _downmix(self) -> Signal:
+        if np.ndim(self.signal.data) == 1:
+            return self.signal
+
+        # A multi-channel signal is analysed in mono, as when streaming
+        signal = Signal()
+        signal.data = np.mean(self.signal.data, axis=0, dtype='float32')
+        signal.rate = self.signal.rate
+
+        return signal
+
+    def start(self) -> dict[str, Any]:
+        signal = self._downmix()
+
+        # The magnitude in decibels is computed once for every threshold
+        segment = Segment(signal, self.settings)
+        decibel = segment.magnitude().decibel().data
+
+        fft = signal.rate / int(
+            self.settings.hop_length_ms / 1000 * signal.rate
+        )
+
+        # Possible thresholding configurations starting at the highest
+        configuration = np.arange(
+            self.settings.min_level_db,
+            self.settings.min_level_db_floor,
+            self.settings.db_delta
+        )
 
-            # Determine how much silence exists in the signal
-            onsets, offsets = self._calculate_onset_offset(
-                vocal_envelope > self.settings.silence_threshold
-            ) / fft
+        # Stop at the first threshold that gives a good envelope
+        sample, vocal_envelope = self._search(decibel, configuration, fft)
 
         onset, offset = self._calculate_onset_offset(
             vocal_envelope > self.settings.silence_threshold
         ) / fft
 
         # Threshold out short syllables
-        mask = (offsets - onsets) >= self.settings.min_syllable_length_s
+        mask = (offset - onset) >= self.settings.min_syllable_length_s
         vocal_envelope = vocal_envelope.astype('float32')
 
         self.component['onset'] = onset[mask]
@@ -111,3 +213,243 @@ class DynamicThresholdSegmentation:
         self.component['vocal_envelope'] = vocal_envelope
 
         return self
+
+
+# The number of levels that the running median is resolved to
+LEVELS = 1024
+
+
+class StreamingSegmentation:
+    def __init__(
+        self,
+        signal: Signal | None = None,
+        settings: Settings | None = None,
+        size: int = 2 ** 16,
+        memory: float = 10.0,
+        warmup: float = 5.0
+    ):
+        self.component: dict[Any, Any] = {}
+        self.memory = memory
+        self.settings = settings
+        self.signal = signal
+        self.size = size
+        self.warmup = warmup
+
+        self.floor = None
+        self.histogram = None
+        self.peak = 0.0
+
+    def _envelope(self, sample: npt.NDArray, fft: float) -> npt.NDArray:
+        rows, length = sample.shape
+
+        if self.histogram is None:
+            self.histogram = np.zeros((rows, LEVELS), dtype='float32')
+
+        # Older frames are forgotten gradually, over the memory in seconds
+        self.histogram *= np.exp(-length / (self.memory * fft))
+
+        # The normalized sample is within [0, 1], so each value has a level
+        level = np.minimum(sample * LEVELS, LEVELS - 1).astype('int64')
+        level += np.arange(rows).reshape((rows, 1)) * LEVELS
+
+        self.histogram += np.bincount(
+            level.ravel(),
+            minlength=rows * LEVELS
+        ).reshape((rows, LEVELS))
+
+        if self.floor is None:
+            # The frames held back at the start give the exact median
+            self.floor = np.median(sample, axis=1)
+        else:
+            # The running median of each row, at the lower edge of its level
+            cumulative = np.cumsum(self.histogram, axis=1)
+            half = cumulative[:, -1:] / 2
+
+            self.floor = np.argmax(cumulative >= half, axis=1) / LEVELS
+
+        sample = sample - self.floor.reshape(
+            (len(sample), 1)
+        )
+
+        sample[sample < 0] = 0
+
+        # Get the vocal envelope
+        vocal_envelope = np.max(sample, axis=0) * np.sqrt(
+            np.mean(sample, axis=0)
+        )
+
+        # Normalize by the loudest frame so far
+        self.peak = max(self.peak, float(np.max(vocal_envelope)))
+
+        if self.peak == 0:
+            return vocal_envelope
+
+        return vocal_envelope / self.peak
+
+    def _frames(
+        self,
+        segment: Segment,
+        plan: Plan,
+        band: slice | None,
+        buffer: npt.NDArray
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        length = len(buffer)
+
+        if length < plan.n_fft:
+            return np.empty((0, 0), dtype='float32'), buffer
+
+        count = 1 + (length - plan.n_fft) // plan.hop_length
+        end = (count - 1) * plan.hop_length + plan.n_fft
+
+        segment.data = plan.stft(
+            buffer[:end],
+            center=False,
+            band=band
+        )
+
+        sample = segment.amplitude_to_decibel().normalize().data
+
+        # The samples of the next frame onward are carried over
+        return sample, buffer[count * plan.hop_length:]
+
+    def _prepare(
+        self,
+        segment: Segment,
+        plan: Plan,
+        block: npt.NDArray | None,
+        previous: npt.NDArray
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        # Pad half a frame at the end of the recording, as in a batch
+        if block is None:
+            return np.zeros(plan.n_fft // 2, dtype='float32'), previous
+
+        if block.ndim == 2:
+            block = np.mean(block, axis=0, dtype='float32')
+
+        # The preemphasis of the first sample depends on the one before
+        data = segment._preemphasis(
+            np.concatenate([previous, block])
+        )[1:]
+
+        return data, block[-1:]
+
+    def _runs(
+        self,
+        signal: npt.NDArray,
+        opening: int | None,
+        frame: int,
+        fft: float
+    ) -> tuple[list[tuple[float, float]], int | None]:
+        # A syllable that is still open continues from the last block
+        padded = np.zeros(len(signal) + 1, dtype='int8')
+        padded[0] = opening is not None
+        padded[1:] = signal
+
+        difference = np.diff(padded)
+
+        onsets = np.flatnonzero(difference == 1) + frame
+        offsets = np.flatnonzero(difference == -1) + frame
+
+        if opening is not None:
+            onsets = np.concatenate([[opening], onsets])
+
+        syllables = [
+            (start / fft, end / fft)
+            for start, end in zip(onsets, offsets)
+            if (end - start) / fft >= self.settings.min_syllable_length_s
+        ]
+
+        opening = onsets[-1] if len(onsets) > len(offsets) else None
+        return syllables, opening
+
+    def start(self) -> dict[str, Any]:
+        onset, offset = [], []
+
+        for start, end in self.stream():
+            onset.append(start)
+            offset.append(end)
+
+        self.component['onset'] = np.array(onset)
+        self.component['offset'] = np.array(offset)
+
+        return self
+
+    def stream(self) -> Iterator[tuple[float, float]]:
+        segment = Segment(self.signal, self.settings)
+
+        self.floor = None
+        self.histogram = None
+        self.peak = 0.0
+
+        plan = None
+        band = None
+
+        # The frame that an unfinished syllable started at
+        opening = None
+        frame = 0
+
+        previous = np.zeros(1, dtype='float32')
+        buffer = None
+
+        # The frames that are held back until the noise floor is seeded
+        pending = []
+        held = 0
+
+        # The last pass flushes the frames at the end of the recording
+        blocks = chain(self.signal.blocks(self.size), [None])
+
+        for block in blocks:
+            if plan is None:
+                plan = Plan.from_settings(self.signal.rate, self.settings)
+                fft = plan.rate / plan.hop_length
+                band = segment.band(plan)
+
+                # Pad half a frame, so the frames are centred as in a batch
+                buffer = np.zeros(plan.n_fft // 2, dtype='float32')
+
+            data, previous = self._prepare(segment, plan, block, previous)
+
+            sample, buffer = self._frames(
+                segment,
+                plan,
+                band,
+                np.concatenate([buffer, data])
+            )
+
+            _, length = sample.shape
+
+            # The first frames seed the noise floor, so a recording that
+            # starts with a vocalization does not set it at syllable level
+            if self.floor is None:
+                if length > 0:
+                    pending.append(sample)
+                    held = held + length
+
+                if held == 0 or (held < self.warmup * fft and block is not None):
+                    continue
+
+                sample = np.concatenate(pending, axis=1)
+                length = held
+
+                pending = []
+
+            if length == 0:
+                continue
+
+            vocal_envelope = self._envelope(sample, fft)
+
+            syllables, opening = self._runs(
+                vocal_envelope > self.settings.silence_threshold,
+                opening,
+                frame,
+                fft
+            )
+
+            yield from syllables
+
+            frame = frame + length
+
+        minimum = self.settings.min_syllable_length_s
+
+        if opening is not None and (frame - opening) / fft >= minimum:
+            yield opening / fft, frame / fft
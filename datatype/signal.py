@@ -14,18 +14,50 @@ if not hasattr(scipy.signal, 'blackman'):
     scipy.signal.blackman = windows.blackman
 
 from abc import abstractmethod, ABC
-from nara_wpe.wpe import wpe
+from datatype import fft
+from datatype.bandpass import Bandpass
+from nara_wpe.wpe import OnlineWPE, wpe
 from nara_wpe.utils import istft, stft
 from pathlib import Path
 from scipy.io import wavfile
-from scipy.signal import butter, lfilter
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     import numpy.typing as npt
 
+    from collections.abc import Iterator
     from datatype.settings import Settings
-    from typing_extensions import BinaryIO, Self
+    from typing_extensions import Any, BinaryIO, Self
+
+
+def pcm_to_float(
+    data: npt.NDArray,
+    out: npt.NDArray | None = None
+) -> npt.NDArray:
+    if out is None:
+        out = np.empty(data.shape, dtype='float32')
+
+    dtype = data.dtype
+
+    if np.issubdtype(dtype, np.floating):
+        np.copyto(out, data)
+        return out
+
+    # Unsigned PCM (8-bit) is centred at the midpoint of its range
+    if np.issubdtype(dtype, np.unsignedinteger):
+        bits = np.iinfo(dtype).bits
+        midpoint = 2 ** (bits - 1)
+
+        np.subtract(data, midpoint, out=out, dtype='float32')
+        out *= np.float32(1.0 / midpoint)
+        return out
+
+    # Signed PCM (16, 24 and 32-bit) is scaled by its full range
+    bits = np.iinfo(dtype).bits
+    scale = np.float32(1.0 / 2 ** (bits - 1))
+
+    np.multiply(data, scale, out=out, dtype='float32')
+    return out
 
 
 class Strategy(ABC):
@@ -37,6 +69,56 @@ class Strategy(ABC):
         raise NotImplementedError
 
 
+class Mapped:
+    def __init__(self, data: npt.NDArray):
+        self.raw = data
+
+    def __array__(
+        self,
+        dtype: npt.DTypeLike | None = None,
+        copy: bool | None = None
+    ) -> npt.NDArray:
+        data = self[:]
+
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+
+        return data
+
+    def __getitem__(self, key: int | slice | tuple) -> npt.NDArray:
+        data = self.raw[key]
+        return pcm_to_float(data)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @property
+    def T(self) -> Mapped:  # noqa: N802
+        return Mapped(self.raw.T)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype('float32')
+
+    @property
+    def ndim(self) -> int:
+        return self.raw.ndim
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.raw.shape
+
+    @property
+    def size(self) -> int:
+        return self.raw.size
+
+    def astype(self, dtype: npt.DTypeLike, **kwargs) -> npt.NDArray:
+        return self[:].astype(dtype, **kwargs)
+
+    def tolist(self) -> list[float]:
+        return self[:].tolist()
+
+
 class Librosa(Strategy):
     def load(
         self,
@@ -45,7 +127,7 @@ class Librosa(Strategy):
         if isinstance(path, Path):
             path = str(path)
 
-        data, rate = librosa.core.load(path, sr=None)
+        data, rate = librosa.core.load(path, sr=None, mono=False)
         return rate, data
 
 
@@ -55,7 +137,23 @@ class Scipy(Strategy):
         path: str | BinaryIO | Path | None
     ) -> tuple[int, npt.NDArray]:
         rate, data = wavfile.read(path)
-        return rate, data
+
+        # The samples are stored as (channels, samples)
+        return rate, data.T
+
+
+class Mmap(Strategy):
+    def load(
+        self,
+        path: str | BinaryIO | Path | None
+    ) -> tuple[int, npt.NDArray | Mapped]:
+        # The samples stay on disk and only the sliced regions are decoded
+        rate, data = wavfile.read(path, mmap=True)
+
+        if np.issubdtype(data.dtype, np.integer):
+            data = Mapped(data)
+
+        return rate, data.T
 
 
 class Soundfile(Strategy):
@@ -67,32 +165,139 @@ class Soundfile(Strategy):
             path = str(path)
 
         data, rate = sf.read(path)
-        return rate, data
+        return rate, data.T
+
+    def blocks(
+        self,
+        path: str | BinaryIO | Path,
+        size: int,
+        overlap: int = 0
+    ) -> Iterator[npt.NDArray]:
+        if isinstance(path, Path):
+            path = str(path)
+
+        for block in sf.blocks(
+            path,
+            blocksize=size,
+            overlap=overlap,
+            dtype='float32'
+        ):
+            yield block.T
+
+    def samplerate(self, path: str | BinaryIO | Path) -> int:
+        if isinstance(path, Path):
+            path = str(path)
+
+        # Only the header is read, not the recording
+        return sf.info(path).samplerate
+
+
+DECODER = {
+    'librosa': Librosa,
+    'mmap': Mmap,
+    'scipy': Scipy,
+    'soundfile': Soundfile,
+}
+
+# The capable decoders for each format, from the fastest to the slowest
+FORMAT = {
+    '.wav': ('scipy', 'soundfile', 'librosa'),
+    '.flac': ('soundfile', 'librosa'),
+    '.ogg': ('soundfile', 'librosa'),
+}
+
+HEADER = {
+    b'RIFF': '.wav',
+    b'RIFX': '.wav',
+    b'RF64': '.wav',
+    b'fLaC': '.flac',
+    b'OggS': '.ogg',
+}
+
+
+def detect(path: str | BinaryIO | Path) -> str | None:
+    if isinstance(path, str | Path):
+        return Path(path).suffix.lower()
+
+    position = path.tell()
+    path.seek(0)
+
+    header = path.read(4)
+    path.seek(position)
+
+    return HEADER.get(header)
+
+
+def decoders(
+    path: str | BinaryIO | Path,
+    name: str | None = None
+) -> list[Strategy]:
+    if name is not None:
+        return [DECODER[name]()]
+
+    extension = detect(path)
+    names = FORMAT.get(extension, ('librosa',))
+
+    return [DECODER[name]() for name in names]
 
 
 class Signal:
-    def __init__(self, path: str | BinaryIO | Path | None = None):
-        self.strategy = Scipy()
+    def __init__(
+        self,
+        path: str | BinaryIO | Path | None = None,
+        strategy: Strategy | str | None = None
+    ):
+        if isinstance(strategy, str):
+            strategy = DECODER[strategy]()
+
+        self.strategy = strategy
         self.path = path
 
-        if path is not None:
-            self.rate, self.data = self._load()
+        self.backend = 'scipy'
+        self.workers = None
+
+        self._data = None
+        self._rate = None
+        self._spectrum = {}
 
     def __len__(self) -> int:
-        return len(self.data)
+        return self.data.shape[-1]
 
     def _load(self) -> tuple[int, npt.NDArray]:
         if isinstance(self.path, Path) and not self.path.exists():
             message = f"{self.path} was not found"
             raise FileNotFoundError(message)
 
-        rate, data = self.strategy.load(self.path)
+        if isinstance(self.path, io.BytesIO):
+            self.path.seek(0)
+
+        if self.strategy is None:
+            rate, data = self._decode()
+        else:
+            rate, data = self.strategy.load(self.path)
 
         if np.issubdtype(data.dtype, np.integer):
-            data = np.array(data / 32768.0).astype('float32')
+            data = pcm_to_float(data)
 
         return rate, data
 
+    def _decode(self) -> tuple[int, npt.NDArray]:
+        # Fall back to a slower decoder when a faster one is not capable
+        for strategy in decoders(self.path):
+            if isinstance(self.path, io.BytesIO):
+                self.path.seek(0)
+
+            try:
+                rate, data = strategy.load(self.path)
+            except (OSError, RuntimeError, ValueError) as exception:
+                error = exception
+                continue
+
+            self.strategy = strategy
+            return rate, data
+
+        raise error
+
     @classmethod
     def deserialize(cls: type[Self], signal: str) -> Signal:
         signal = dict(signal)
@@ -106,11 +311,26 @@ class Signal:
         )
 
         rate = signal.get('rate')
+        data = signal.get('data')
 
-        data = np.array(
-            signal.get('data'),
-            dtype='float32'
-        )
+        if isinstance(data, bytes):
+            data = np.frombuffer(
+                data,
+                dtype=signal.get('dtype')
+            )
+
+            data = pcm_to_float(data)
+
+            shape = signal.get('shape')
+
+            if shape is not None:
+                data = data.reshape(shape)
+        else:
+            # The legacy format stores every sample as a Python float
+            data = np.array(
+                data,
+                dtype='float32'
+            )
 
         signal = cls()
         signal.path = path
@@ -118,99 +338,240 @@ class Signal:
         signal.data = data
         return signal
 
+    @property
+    def data(self) -> npt.NDArray:
+        if self._data is None and self.path is not None:
+            self._rate, self._data = self._load()
+
+        return self._data
+
+    @data.setter
+    def data(self, data: npt.NDArray) -> None:
+        self._data = data
+        self._spectrum.clear()
+
+    @property
+    def rate(self) -> int:
+        if self._rate is None and self.path is not None:
+            self._rate, self._data = self._load()
+
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate: int) -> None:
+        self._rate = rate
+
+    def blocks(self, size: int, overlap: int = 0) -> Iterator[npt.NDArray]:
+        if overlap >= size:
+            message = 'The overlap must be smaller than the block size'
+            raise ValueError(message)
+
+        # Stream from the file when the recording has not been loaded
+        if self._data is None and self.path is not None:
+            strategy = (
+                self.strategy
+                if isinstance(self.strategy, Soundfile)
+                else Soundfile()
+            )
+
+            if self._rate is None:
+                if isinstance(self.path, io.BytesIO):
+                    self.path.seek(0)
+
+                self._rate = strategy.samplerate(self.path)
+
+            if isinstance(self.path, io.BytesIO):
+                self.path.seek(0)
+
+            yield from strategy.blocks(self.path, size, overlap)
+            return
+
+        length = len(self)
+        step = size - overlap
+
+        stop = max(length - overlap, 1) if length > 0 else 0
+
+        for start in range(0, stop, step):
+            block = self.data[..., start:start + size]
+            yield np.asarray(block, dtype='float32')
+
+    @property
+    def channels(self) -> int:
+        return 1 if self.data.ndim == 1 else self.data.shape[0]
+
     @property
     def duration(self) -> float:
-        self._duration = len(self.data) / float(self.rate)
+        self._duration = len(self) / float(self.rate)
         return self._duration
 
-    def filter(self, lowcut: float, highcut: float, order: int = 5) -> None:
-        if highcut > int(self.rate / 2):
-            highcut = int(self.rate / 2)
-
-        nyquist = 0.5 * self.rate
-        low = lowcut / nyquist
-        high = highcut / nyquist
+    def downmix(self) -> None:
+        if self.data.ndim == 1:
+            return
 
-        numerator, denominator = butter(
-            order,
-            [low, high],
-            btype='band'
-        )
+        data = np.asarray(self.data)
+        self.data = np.mean(data, axis=0, dtype='float32')
 
-        self.data = lfilter(
-            numerator,
-            denominator,
-            self.data
-        )
+    def select(self, channel: int) -> None:
+        if self.data.ndim == 1:
+            return
 
-    def frequencies(self) -> tuple[float, float]:
-        timestep = 1.0 / self.rate
+        self.data = np.asarray(self.data[channel])
 
-        time = np.arange(
-            0,
-            self.duration,
-            timestep
+    def filter(
+        self,
+        lowcut: float,
+        highcut: float,
+        order: int = 5,
+        zero_phase: bool = False
+    ) -> None:
+        bandpass = Bandpass(
+            self.rate,
+            lowcut,
+            highcut,
+            order,
+            zero_phase
         )
 
-        fft = abs(
-            scipy.fft.fft(self.data)
-        )
+        self.data = bandpass(self.data)
 
-        bisection = fft[
-            range(self.data.size // 2)
-        ]
+    def frequencies(
+        self,
+        fast: bool = False,
+        settings: Settings | None = None
+    ) -> tuple[float, float]:
+        frequencies, magnitude = self.spectrum(fast=fast, settings=settings)
 
-        bisection = abs(bisection)
+        half = fft.length(len(self), fast) // 2
 
-        frequencies = scipy.fftpack.fftfreq(
-            self.data.size,
-            time[1] - time[0]
-        )
+        halved = frequencies[:half]
+        amplitude = magnitude[..., :half]
 
-        halved = frequencies[
-            range(self.data.size // 2)
-        ]
+        # A frequency is present if it is present in any channel
+        if amplitude.ndim == 2:
+            amplitude = np.max(amplitude, axis=0)
 
-        amplitude = np.array(bisection)
-        threshold = np.where(amplitude > 5)
+        threshold = amplitude > 5
 
-        if halved[threshold].size == 0:
+        if not np.any(threshold):
             return (np.nan, np.nan)
 
-        minimum = min(halved[threshold])
-        maximum = max(halved[threshold])
+        minimum = np.min(halved[threshold])
+        maximum = np.max(halved[threshold])
 
         return (minimum, maximum)
 
-    def mean(self) -> npt.NDArray:
-        fft = scipy.fft.fft(self.data)
+    def mean(
+        self,
+        size: int | None = None,
+        fast: bool = False,
+        settings: Settings | None = None
+    ) -> npt.NDArray:
+        frequencies, magnitude = self.spectrum(size, fast, settings)
+
+        if size is None:
+            # Keep the strictly positive frequencies below the Nyquist bin
+            stop = (fft.length(len(self), fast) + 1) // 2
+        else:
+            stop = len(frequencies)
 
-        frequencies = scipy.fft.fftfreq(
-            len(self.data),
-            1 / self.rate
-        )
+        frequencies = frequencies[1:stop]
+        power = magnitude[..., 1:stop] ** 2
 
-        mask = frequencies > 0
-        frequencies = frequencies[mask]
-        power = np.abs(fft[mask])**2
+        if power.ndim == 2:
+            power = np.sum(power, axis=0)
 
         return np.sum(frequencies * power) / np.sum(power)
 
+    def spectrum(
+        self,
+        size: int | None = None,
+        fast: bool = False,
+        settings: Settings | None = None
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        # The backend and threads are configured as for the spectrogram
+        if settings is not None:
+            self.backend = getattr(settings, 'fft', None) or self.backend
+            self.workers = getattr(settings, 'workers', self.workers)
+
+        # Padding to a fast length only applies to the full spectrum
+        key = (size, fast and size is None)
+
+        if key in self._spectrum:
+            return self._spectrum[key]
+
+        if size is None:
+            data = np.asarray(self.data)
+
+            magnitude = np.abs(
+                fft.rfft(
+                    data,
+                    axis=-1,
+                    workers=self.workers,
+                    fast=fast,
+                    backend=self.backend
+                )
+            )
+
+            frequencies = fft.rfftfreq(
+                data.shape[-1],
+                1 / self.rate,
+                fast
+            )
+        else:
+            frequencies, magnitude = self._welch(size)
+
+        self._spectrum[key] = (frequencies, magnitude)
+        return self._spectrum[key]
+
+    def _welch(self, size: int) -> tuple[npt.NDArray, npt.NDArray]:
+        # Average the power of half-overlapping windows, one block at a time
+        window = windows.hann(size, sym=False).astype('float32')
+
+        power = 0.0
+        count = 0
+
+        for block in self.blocks(size, size // 2):
+            length = block.shape[-1]
+
+            if length < size:
+                padding = [(0, 0)] * (block.ndim - 1) + [(0, size - length)]
+                block = np.pad(block, padding)
+
+            power = power + np.abs(
+                fft.rfft(
+                    block * window,
+                    axis=-1,
+                    workers=self.workers,
+                    backend=self.backend
+                )
+            ) ** 2
+
+            count = count + 1
+
+        power = power / max(count, 1)
+
+        # Streaming the blocks reads the rate from the header, not the recording
+        frequencies = fft.rfftfreq(size, 1 / self.rate)
+        return frequencies, np.sqrt(power)
+
     def normalize(self) -> None:
         self.data = librosa.util.normalize(
-            self.data
+            np.asarray(self.data),
+            axis=-1
         )
 
     def reduce(self, **kwargs) -> None:
         self.data = nr.reduce_noise(
-            y=self.data,
+            y=np.asarray(self.data),
             sr=self.rate,
             **kwargs
         )
 
     def dereverberate(self, settings: Settings) -> None:
-        data = [self.data]
-        y = np.stack(data)
+        data = np.asarray(self.data)
+
+        # nara_wpe expects (channels, samples), even for a mono signal
+        y = np.atleast_2d(data)
 
         size = settings.size
         shift = settings.shift
@@ -220,19 +581,41 @@ class Signal:
             'shift': shift
         }
 
-        y = stft(y, **options).transpose(2, 0, 1)
+        y = stft(y, **options)
 
         taps = settings.taps
         delay = settings.delay
-        iterations = settings.iterations
 
-        x = wpe(
-            y,
-            taps=taps,
-            delay=delay,
-            iterations=iterations,
-            statistics_mode='full'
-        ).transpose(1, 2, 0)
+        mode = getattr(settings, 'mode', 'batch')
+
+        if mode == 'online':
+            # Process one STFT frame at a time with a bounded state
+            channels, _, bins = y.shape
+
+            online = OnlineWPE(
+                taps=taps,
+                delay=delay,
+                alpha=settings.alpha,
+                channel=channels,
+                frequency_bins=bins
+            )
+
+            x = np.stack(
+                [
+                    online.step_frame(frame)
+                    for frame in y.transpose(1, 2, 0)
+                ]
+            ).transpose(2, 0, 1)
+        else:
+            iterations = settings.iterations
+
+            x = wpe(
+                y.transpose(2, 0, 1),
+                taps=taps,
+                delay=delay,
+                iterations=iterations,
+                statistics_mode='full'
+            ).transpose(1, 2, 0)
 
         z = istft(
             x,
@@ -240,42 +623,70 @@ class Signal:
             shift=shift
         )
 
-        self.data = z[0]
-
-    def segment(self, onset: float, offset: float) -> Signal:
-        data = self.data[
-            int(onset * self.rate):
-            int(offset * self.rate)
-        ]
-
-        data = data.astype('float32')
-
-        buffer = io.BytesIO()
-
-        wavfile.write(
-            buffer,
-            self.rate,
-            data
-        )
+        self.data = z[0] if data.ndim == 1 else z
 
-        return Signal(buffer)
+    def segment(self, onset: float, offset: float) -> Excerpt:
+        return Excerpt(self, onset, offset)
 
     def save(self, path: str | Path) -> None:
         wavfile.write(
             path,
             self.rate,
-            self.data
+            np.asarray(self.data).T
         )
 
-    def serialize(self) -> None:
+    def serialize(self, dtype: str = 'float32') -> dict[str, Any]:
         if isinstance(self.path, io.BytesIO):
             self.path.seek(0)
             path = self.path.read()
         else:
             path = str(self.path)
 
+        data = np.asarray(self.data)
+
+        if dtype == 'int16':
+            data = np.clip(
+                np.round(data * 32768.0),
+                -32768,
+                32767
+            ).astype('int16')
+        else:
+            data = data.astype(dtype, copy=False)
+
         return {
             'path': path,
             'rate': self.rate,
-            'data': self.data.tolist()
+            'dtype': data.dtype.str,
+            'shape': list(data.shape),
+            'data': data.tobytes()
         }
+
+
+class Excerpt(Signal):
+    def __init__(self, signal: Signal, onset: float, offset: float):
+        super().__init__()
+
+        self.onset = onset
+        self.offset = offset
+        self.rate = signal.rate
+
+        # A view that shares the buffer of the parent signal
+        self.data = signal.data[
+            ...,
+            int(onset * self.rate):
+            int(offset * self.rate)
+        ]
+
+    def serialize(self, dtype: str = 'float32') -> dict[str, Any]:
+        data = np.asarray(self.data, dtype='float32')
+
+        buffer = io.BytesIO()
+
+        wavfile.write(
+            buffer,
+            self.rate,
+            data.T
+        )
+
+        self.path = buffer
+        return super().serialize(dtype)
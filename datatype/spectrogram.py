@@ -3,23 +3,36 @@ from __future__ import annotations
 import librosa
 import numpy as np
 import os
-import tensorflow as tf
 
 from abc import ABC, abstractmethod
+from datatype import fft
+from datatype.cache import SpectrogramCache
+from datatype.signal import Signal
+from functools import lru_cache
 from librosa import mel_frequencies
+from numpy.lib.stride_tricks import sliding_window_view
 from PIL import Image
-from scipy.signal import lfilter
+from scipy.signal import get_window, lfilter
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     import numpy.typing as npt
 
     from datatype.settings import Settings
-    from datatype.signal import Signal
     from typing_extensions import Self
 
 
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+# The number of frames that are windowed and transformed at once
+BLOCK = 1024
+
+# The length, in samples, that batched signals are padded to a multiple of
+BUCKET = 1024
+
+# The number of samples that are stacked into a single batch
+BATCH = 2 ** 17
+
+# The magnitude of recent spectrograms, before any post-processing
+MAGNITUDE = SpectrogramCache(budget=2 ** 28)
 
 
 def compress(spectrogram: npt.NDArray) -> npt.NDArray:
@@ -32,6 +45,51 @@ def compress(spectrogram: npt.NDArray) -> npt.NDArray:
     return (spectrogram * 255).astype('uint8')
 
 
+@lru_cache(maxsize=16)
+def create_basis(
+    rate: int,
+    n_fft: int,
+    num_mel_bins: int,
+    fmin: float,
+    fmax: float
+) -> npt.NDArray:
+    basis = librosa.filters.mel(
+        sr=rate,
+        n_fft=n_fft,
+        n_mels=num_mel_bins,
+        fmin=fmin,
+        fmax=fmax,
+        dtype=np.float32
+    )
+
+    basis = basis.T / np.sum(basis, axis=1)
+    basis = np.nan_to_num(basis).T
+
+    # The basis is shared by every spectrogram, so it must not change
+    basis.flags.writeable = False
+    return basis
+
+
+@lru_cache(maxsize=16)
+def create_plan(
+    rate: int,
+    n_fft: int,
+    hop_length: int,
+    win_length: int,
+    *,
+    workers: int | None = None,
+    backend: str = 'scipy'
+) -> Plan:
+    return Plan(
+        rate,
+        n_fft,
+        hop_length,
+        win_length,
+        workers=workers,
+        backend=backend
+    )
+
+
 def create_spectrogram(
     signal: Signal,
     settings: Settings,
@@ -41,7 +99,74 @@ def create_spectrogram(
     strategy = Linear(signal, settings, matrix)
     spectrogram.strategy = strategy
 
-    return spectrogram.generate()
+    # Batch jobs rarely see the same signal twice
+    return spectrogram.generate(cache=False)
+
+
+def create_spectrograms(
+    signals: list[Signal],
+    settings: Settings,
+    matrix: npt.NDArray | None = None,
+    padding: int | None = None
+) -> list[npt.NDArray]:
+    # Group the signals by rate and by length, rounded up to a bucket
+    buckets = {}
+
+    for index, signal in enumerate(signals):
+        length = len(signal)
+        bucket = max(1, -(-length // BUCKET)) * BUCKET
+
+        buckets.setdefault((signal.rate, bucket), []).append(index)
+
+    spectrograms = [None] * len(signals)
+
+    batches = [
+        (rate, bucket, indices[start:start + max(1, BATCH // bucket)])
+        for (rate, bucket), indices in buckets.items()
+        for start in range(0, len(indices), max(1, BATCH // bucket))
+    ]
+
+    for rate, bucket, indices in batches:
+        batch = Signal()
+        batch.rate = rate
+
+        strategy = Linear(batch, settings, matrix)
+
+        # The trailing zeros, added after the preemphasis, do not change
+        # the frames of the shorter signals
+        stack = np.zeros((len(indices), bucket), dtype='float32')
+
+        for row, index in enumerate(indices):
+            data = strategy._preemphasis(signals[index].data)
+            stack[row, :len(data)] = data
+
+        strategy.data = stack
+
+        spectrogram = (
+            strategy
+            .stft()
+            .amplitude_to_decibel()
+            .normalize()
+            .build()
+            .data
+        )
+
+        plan = Plan.from_settings(rate, settings)
+
+        for row, index in enumerate(indices):
+            count = plan.count(
+                len(signals[index])
+            )
+
+            data = spectrogram[row, :, :count]
+
+            spectrograms[index] = (
+                np.array(data)
+                if padding is None
+                else pad(data, padding)
+            )
+
+    return spectrograms
 
 
 def flatten(spectrogram: npt.NDArray) -> npt.NDArray:
@@ -56,7 +181,11 @@ def flatten(spectrogram: npt.NDArray) -> npt.NDArray:
     )
 
 
-def mel_matrix(settings: Settings) -> npt.NDArray:
+def _mel_matrix_tensorflow(settings: Settings) -> npt.NDArray:
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+    import tensorflow as tf
+
     # https://stackoverflow.com/questions/54047654/tensorflow-different-results-with-the-same-random-seed
 
     # Create a filter to convolve with the spectrogram
@@ -101,6 +230,80 @@ def mel_matrix(settings: Settings) -> npt.NDArray:
     return mel_matrix.numpy()
 
 
+def hertz_to_mel(frequencies: npt.NDArray) -> npt.NDArray:
+    # The HTK mel scale, as used by tf.signal
+    return 1127.0 * np.log1p(frequencies / 700.0)
+
+
+def linear_to_mel_weight_matrix(
+    num_mel_bins: int,
+    num_spectrogram_bins: int,
+    sample_rate: int,
+    lower_edge_hertz: float,
+    upper_edge_hertz: float
+) -> npt.NDArray:
+    nyquist = sample_rate / 2.0
+
+    # The DC bin is excluded and receives no weight
+    frequencies = np.linspace(0.0, nyquist, num_spectrogram_bins)[1:]
+    spectrogram = hertz_to_mel(frequencies)[:, np.newaxis]
+
+    edges = np.linspace(
+        hertz_to_mel(lower_edge_hertz),
+        hertz_to_mel(upper_edge_hertz),
+        num_mel_bins + 2
+    )
+
+    lower = edges[:-2]
+    center = edges[1:-1]
+    upper = edges[2:]
+
+    lower_slope = (spectrogram - lower) / (center - lower)
+    upper_slope = (upper - spectrogram) / (upper - center)
+
+    weights = np.maximum(
+        0.0,
+        np.minimum(lower_slope, upper_slope)
+    )
+
+    return np.pad(weights, [(1, 0), (0, 0)])
+
+
+def mel_matrix(
+    settings: Settings,
+    tensorflow: bool = False
+) -> npt.NDArray:
+    if tensorflow:
+        return _mel_matrix_tensorflow(settings)
+
+    # Create a filter to convolve with the spectrogram
+    mel_matrix = linear_to_mel_weight_matrix(
+        num_mel_bins=settings.num_mel_bins,
+        num_spectrogram_bins=int(settings.n_fft / 2) + 1,
+        sample_rate=settings.sample_rate,
+        lower_edge_hertz=settings.mel_lower_edge_hertz,
+        upper_edge_hertz=settings.mel_upper_edge_hertz
+    )
+
+    # Get the center frequencies of mel bands
+    mel_f = mel_frequencies(
+        n_mels=settings.num_mel_bins + 2,
+        fmin=settings.mel_lower_edge_hertz,
+        fmax=settings.mel_upper_edge_hertz
+    )
+
+    # Slaney-style is scaled to be approximately constant energy per channel
+    enorm = 2.0 / (
+        mel_f[2: settings.num_mel_bins + 2] -
+        mel_f[: settings.num_mel_bins]
+    )
+
+    mel_matrix = mel_matrix * enorm[np.newaxis, :]
+    mel_matrix = mel_matrix / np.sum(mel_matrix, axis=0)
+
+    return mel_matrix.astype('float32')
+
+
 def pad(spectrogram: npt.NDArray, padding: int) -> npt.NDArray:
     _, y = np.shape(spectrogram)
 
@@ -119,6 +322,31 @@ def pad(spectrogram: npt.NDArray, padding: int) -> npt.NDArray:
     )
 
 
+def pyramid(
+    spectrogram: npt.NDArray,
+    minimum: int = 256,
+    mode: str = 'max'
+) -> list[npt.NDArray]:
+    reduce = np.max if mode == 'max' else np.mean
+
+    # Each level halves the number of time frames of the one before
+    levels = [spectrogram]
+
+    while levels[-1].shape[-1] // 2 >= minimum:
+        level = levels[-1]
+        *shape, length = level.shape
+
+        if length % 2 == 1:
+            padding = [(0, 0)] * len(shape) + [(0, 1)]
+            level = np.pad(level, padding, mode='edge')
+            length = length + 1
+
+        level = level.reshape(*shape, length // 2, 2)
+        levels.append(reduce(level, axis=-1))
+
+    return levels
+
+
 def resize(spectrogram: npt.NDArray, factor: int = 10) -> npt.NDArray:
     x, y = np.shape(spectrogram)
     shape = [int(np.log(y) * factor), x]
@@ -130,7 +358,113 @@ def resize(spectrogram: npt.NDArray, factor: int = 10) -> npt.NDArray:
     )
 
 
+class Plan:
+    def __init__(
+        self,
+        rate: int,
+        n_fft: int,
+        hop_length: int,
+        win_length: int,
+        *,
+        workers: int | None = None,
+        backend: str = 'scipy'
+    ):
+        self.backend = backend
+        self.rate = rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.win_length = win_length
+        self.workers = workers
+
+        # A periodic Hann window, centred and padded to n_fft
+        window = get_window('hann', win_length, fftbins=True)
+        self.window = librosa.util.pad_center(window, size=n_fft)
+
+    @classmethod
+    def from_settings(cls: type[Self], rate: int, settings: Settings) -> Plan:
+        hop_length = int(settings.hop_length_ms / 1000 * rate)
+        win_length = int(settings.win_length_ms / 1000 * rate)
+        workers = getattr(settings, 'workers', None)
+        backend = getattr(settings, 'fft', None) or 'scipy'
+
+        return create_plan(
+            rate,
+            settings.n_fft,
+            hop_length,
+            win_length,
+            workers=workers,
+            backend=backend
+        )
+
+    def band(self, lower: float, upper: float) -> slice:
+        # The rows of the frequency bins between the lower and upper edge
+        resolution = (self.rate / 2) / (self.n_fft // 2 + 1)
+        return slice(int(lower / resolution), int(upper / resolution))
+
+    def count(self, length: int) -> int:
+        # The number of centred frames for a signal of a given length
+        half = self.n_fft // 2
+        return 1 + (length + 2 * half - self.n_fft) // self.hop_length
+
+    def frame(self, y: npt.NDArray, center: bool = True) -> npt.NDArray:
+        # Centre the frames by padding half a frame on either side
+        if center:
+            half = self.n_fft // 2
+            padding = [(0, 0)] * (y.ndim - 1) + [(half, half)]
+
+            y = np.pad(y, padding)
+
+        # A strided view of shape (..., frames, n_fft) without a copy
+        frames = sliding_window_view(y, self.n_fft, axis=-1)
+        return frames[..., ::self.hop_length, :]
+
+    def stft(
+        self,
+        y: npt.NDArray,
+        center: bool = True,
+        band: slice | None = None
+    ) -> npt.NDArray:
+        frames = self.frame(y, center)
+        window = self.window.astype(frames.dtype, copy=False)
+
+        # Only the frequency bins within the band are kept
+        if band is None:
+            band = slice(None)
+
+        *shape, length, _ = frames.shape
+        bins = len(range(self.n_fft // 2 + 1)[band])
+
+        dtype = np.result_type(frames.dtype, np.complex64)
+        stft = np.empty((*shape, length, bins), dtype=dtype)
+
+        # Only a block of windowed frames is held in memory at a time
+        step = max(1, BLOCK // int(np.prod(shape, dtype=int)))
+
+        for start in range(0, length, step):
+            end = start + step
+
+            spectrum = fft.rfft(
+                frames[..., start:end, :] * window,
+                axis=-1,
+                workers=self.workers,
+                backend=self.backend
+            )
+
+            stft[..., start:end, :] = spectrum[..., band]
+
+        # The frequency bins come first, as in librosa
+        return np.swapaxes(stft, -1, -2)
+
+
 class SpectrogramStrategy(ABC):
+    # The settings that change the magnitude, before any post-processing
+    parameters = (
+        'n_fft',
+        'hop_length_ms',
+        'win_length_ms',
+        'preemphasis',
+    )
+
     def __init__(
         self,
         signal: Signal | None = None,
@@ -144,12 +478,15 @@ class SpectrogramStrategy(ABC):
         self.signal = signal
         self.settings = settings
 
+    def band(self, _plan: Plan) -> slice | None:
+        return None
+
     def build(self) -> Self:
         if self.matrix is not None:
-            self.data = np.dot(
-                self.data.T,
-                self.matrix
-            ).T
+            self.data = np.matmul(
+                self.matrix.T,
+                self.data
+            )
 
         return self
 
@@ -161,6 +498,14 @@ class SpectrogramStrategy(ABC):
 
         return self
 
+    def decibel(self) -> Self:
+        # The magnitude may be cached, so it is converted in a copy
+        self.data = self._to_decibel(
+            np.array(self.data)
+        )
+
+        return self
+
     def denormalize(self) -> Self:
         self.data = (
             np.clip(self.data, 0, 1) * -self.settings.min_level_db
@@ -168,22 +513,45 @@ class SpectrogramStrategy(ABC):
 
         return self
 
+    def magnitude(self) -> Self:
+        key = MAGNITUDE.key(
+            self.signal,
+            self.settings,
+            type(self).__name__,
+            self.parameters
+        )
+
+        magnitude = MAGNITUDE.get(key)
+
+        if magnitude is None:
+            magnitude = self.preemphasis().stft().amplitude().data
+            MAGNITUDE.put(key, magnitude)
+
+        self.data = magnitude
+        return self
+
     def normalize(self) -> Self:
         if self.is_normalize:
-            self.data = np.clip(
-                (self.data - self.settings.min_level_db) /
-                -self.settings.min_level_db,
-                0,
-                1
-            )
+            min_level_db = self.settings.min_level_db
+
+            self.data -= min_level_db
+            self.data /= -min_level_db
+
+            np.clip(self.data, 0, 1, out=self.data)
 
         return self
 
-    def preemphasis(self) -> Self:
-        self.data = lfilter(
-            [1, -self.settings.preemphasis], [1], self.signal.data
-        )
+    def _preemphasis(self, data: npt.NDArray) -> npt.NDArray:
+        data = np.asarray(data, dtype='float32')
 
+        # Float32 coefficients keep the filtered signal in float32
+        numerator = np.array([1, -self.settings.preemphasis], dtype='float32')
+        denominator = np.ones(1, dtype='float32')
+
+        return lfilter(numerator, denominator, data)
+
+    def preemphasis(self) -> Self:
+        self.data = self._preemphasis(self.signal.data)
         return self
 
     def inverse_preemphasis(self) -> Self:
@@ -196,16 +564,11 @@ class SpectrogramStrategy(ABC):
         return self
 
     def stft(self) -> Self:
-        y = self.data
-        n_fft = self.settings.n_fft
-        hop_length = int(self.settings.hop_length_ms / 1000 * self.signal.rate)
-        win_length = int(self.settings.win_length_ms / 1000 * self.signal.rate)
+        plan = Plan.from_settings(self.signal.rate, self.settings)
 
-        self.data = librosa.stft(
-            y=y,
-            n_fft=n_fft,
-            hop_length=hop_length,
-            win_length=win_length,
+        self.data = plan.stft(
+            self.data,
+            band=self.band(plan)
         )
 
         return self
@@ -223,10 +586,26 @@ class SpectrogramStrategy(ABC):
 
         return self
 
+    def _to_decibel(self, data: npt.NDArray) -> npt.NDArray:
+        # Convert the magnitude in place, without any temporary arrays
+        np.maximum(data, 1e-5, out=data)
+        np.log10(data, out=data)
+
+        data *= 20
+        data -= self.settings.ref_level_db
+
+        return data
+
     @abstractmethod
-    def amplitude_to_decibel(self) -> Self:
+    def amplitude(self) -> Self:
         raise NotImplementedError
 
+    def amplitude_to_decibel(self) -> Self:
+        self.amplitude()
+        self.data = self._to_decibel(self.data)
+
+        return self
+
 
 class Linear(SpectrogramStrategy):
     def __init__(
@@ -243,17 +622,19 @@ class Linear(SpectrogramStrategy):
             is_normalize
         )
 
-    def amplitude_to_decibel(self) -> Self:
-        data = np.abs(self.data)
-
-        self.data = 20 * np.log10(
-            np.maximum(1e-5, data)
-        ) - self.settings.ref_level_db
-
+    def amplitude(self) -> Self:
+        self.data = np.abs(self.data)
         return self
 
 
 class Mel(SpectrogramStrategy):
+    parameters = (
+        *SpectrogramStrategy.parameters,
+        'num_mel_bins',
+        'mel_lower_edge_hertz',
+        'mel_upper_edge_hertz',
+    )
+
     def __init__(
         self,
         signal: Signal | None = None,
@@ -269,33 +650,32 @@ class Mel(SpectrogramStrategy):
         )
 
     def _create_basis(self) -> npt.NDArray:
-        basis = librosa.filters.mel(
-            sr=self.signal.rate,
-            n_fft=self.settings.n_fft,
-            n_mels=self.settings.num_mel_bins,
-            fmin=self.settings.mel_lower_edge_hertz,
-            fmax=self.settings.mel_upper_edge_hertz,
+        return create_basis(
+            self.signal.rate,
+            self.settings.n_fft,
+            self.settings.num_mel_bins,
+            self.settings.mel_lower_edge_hertz,
+            self.settings.mel_upper_edge_hertz
         )
 
-        basis = basis.T / np.sum(basis, axis=1)
-        return np.nan_to_num(basis).T
-
     def _linear_to_mel(self, basis: npt.NDArray) -> npt.NDArray:
+        return np.matmul(basis, self.data)
+
+    def amplitude(self) -> Self:
         basis = self._create_basis()
-        return np.dot(basis, self.data)
 
-    def amplitude_to_decibel(self) -> Self:
         self.data = np.abs(self.data)
-        self.data = self._linear_to_mel(self.data)
-
-        self.data = 20 * np.log10(
-            np.maximum(1e-5, self.data)
-        ) - self.settings.ref_level_db
+        self.data = self._linear_to_mel(basis)
 
         return self
 
 
 class Segment(SpectrogramStrategy):
+    parameters = (
+        *SpectrogramStrategy.parameters,
+        'spectral_range',
+    )
+
     def __init__(
         self,
         signal: Signal | None = None,
@@ -310,14 +690,16 @@ class Segment(SpectrogramStrategy):
             is_normalize
         )
 
-    def amplitude_to_decibel(self) -> Self:
-        data = np.abs(self.data)
+    def amplitude(self) -> Self:
+        self.data = np.abs(self.data)
+        return self
 
-        self.data = 20 * np.log10(
-            np.maximum(1e-5, data)
-        ) - self.settings.ref_level_db
+    def band(self, plan: Plan) -> slice | None:
+        # Segmentation only ever looks at the bins within the spectral range
+        if self.settings.spectral_range is None:
+            return None
 
-        return self
+        return plan.band(*self.settings.spectral_range)
 
 
 class Spectrogram:
@@ -356,13 +738,81 @@ class Spectrogram:
     def settings(self, settings: Settings) -> None:
         self.strategy.settings = settings
 
-    def generate(self) -> npt.NDArray:
+    def generate(self, cache: bool = True) -> npt.NDArray:
+        if not cache:
+            return (
+                self.strategy
+                .preemphasis()
+                .stft()
+                .amplitude_to_decibel()
+                .normalize()
+                .build()
+                .data
+            )
+
+        # Only the post-processing runs again when the magnitude is cached
         return (
             self.strategy
-            .preemphasis()
-            .stft()
-            .amplitude_to_decibel()
+            .magnitude()
+            .decibel()
             .normalize()
             .build()
             .data
         )
+
+    def tile(
+        self,
+        size: int = BLOCK,
+        out: npt.NDArray | None = None
+    ) -> npt.NDArray:
+        signal = self.strategy.signal
+        plan = Plan.from_settings(signal.rate, self.strategy.settings)
+
+        length = len(signal)
+        half = plan.n_fft // 2
+        count = plan.count(length)
+
+        for first in range(0, count, size):
+            last = min(first + size, count)
+
+            # The samples under the tile, in the coordinates of the signal
+            start = first * plan.hop_length - half
+            stop = (last - 1) * plan.hop_length - half + plan.n_fft
+
+            lower = max(start, 0)
+            upper = min(stop, length)
+
+            # The preemphasis of the first sample depends on the one before
+            context = 1 if lower > 0 else 0
+
+            data = self.strategy._preemphasis(
+                signal.data[..., lower - context:upper]
+            )[..., context:]
+
+            padding = [(0, 0)] * (data.ndim - 1)
+            padding.append((lower - start, stop - upper))
+
+            self.strategy.data = plan.stft(
+                np.pad(data, padding),
+                center=False,
+                band=self.strategy.band(plan)
+            )
+
+            data = (
+                self.strategy
+                .amplitude_to_decibel()
+                .normalize()
+                .build()
+                .data
+            )
+
+            if out is None:
+                shape = (*data.shape[:-1], count)
+                out = np.empty(shape, dtype=data.dtype)
+
+            if out.dtype == np.uint8:
+                data *= 255
+
+            np.copyto(out[..., first:last], data, casting='unsafe')
+
+        return out
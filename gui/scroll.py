@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from gui.canvas import Canvas
+from datatype.cache import SpectrogramCache
 from datatype.segmentation import DynamicThresholdSegmentation
-from datatype.spectrogram import Linear, Spectrogram
+from datatype.spectrogram import Linear, pyramid, Spectrogram
 from matplotlib.backend_bases import MouseButton
 from matplotlib.patches import Rectangle
 from PyQt6.QtCore import pyqtSignal, Qt
@@ -15,6 +16,8 @@ from PyQt6.QtWidgets import (
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import numpy.typing as npt
+
     from datatype.settings import Settings
     from datatype.signal import Signal
     from matplotlib.axes import Axes
@@ -25,9 +28,16 @@ if TYPE_CHECKING:
 class ScrollableWindow(QWidget):
     error = pyqtSignal(str)
 
-    def __init__(self, fig: Figure, ax: Axes):
+    def __init__(
+        self,
+        fig: Figure,
+        ax: Axes,
+        cache: SpectrogramCache | None = None
+    ):
         super().__init__()
 
+        self.cache = SpectrogramCache() if cache is None else cache
+        self.levels = []
         self.minimum = 1.0
         self.last = None
         self.zoom = 1.0
@@ -129,6 +139,8 @@ class ScrollableWindow(QWidget):
         self.canvas.setFixedWidth(width)
         self.canvas.setFixedHeight(height)
 
+        self.select()
+
     def on_scroll(self, event: MouseEvent) -> None:
         rx = event.x / self.canvas.width()
         ry = event.y / self.canvas.height()
@@ -170,21 +182,51 @@ class ScrollableWindow(QWidget):
         self.scroll.horizontalScrollBar().setValue(sx)
         self.scroll.verticalScrollBar().setValue(sy)
 
-    def display(self, signal: Signal, settings: Settings) -> None:
-        strategy = Linear(
-            signal=signal,
-            settings=settings
-        )
+    def level(self) -> npt.NDArray:
+        # The coarsest level with at least one frame for every pixel
+        width = self.canvas.width()
+
+        for level in reversed(self.levels):
+            if level.shape[-1] >= width:
+                return level
 
-        spectrogram = Spectrogram(strategy=strategy)
+        return self.levels[0]
+
+    def select(self) -> None:
+        if self.canvas.image is None or not self.levels:
+            return
 
+        level = self.level()
+
+        if self.canvas.image.get_array().shape != level.shape:
+            self.canvas.image.set_data(level)
+
+    def display(self, signal: Signal, settings: Settings) -> None:
         try:
-            spectrogram = spectrogram.generate()
+            key = self.cache.key(signal, settings)
+            spectrogram = self.cache.get(key)
         except Exception as exception:
             message = str(exception)
             self.error.emit(message)
             return
 
+        if spectrogram is None:
+            strategy = Linear(
+                signal=signal,
+                settings=settings
+            )
+
+            spectrogram = Spectrogram(strategy=strategy)
+
+            try:
+                spectrogram = spectrogram.generate()
+            except Exception as exception:
+                message = str(exception)
+                self.error.emit(message)
+                return
+
+            self.cache.put(key, spectrogram)
+
         algorithm = DynamicThresholdSegmentation(
             signal=signal,
             settings=settings
@@ -217,8 +259,10 @@ class ScrollableWindow(QWidget):
             y_maximum
         ]
 
+        self.levels = pyramid(spectrogram)
+
         self.canvas.image = self.canvas.ax.matshow(
-            spectrogram,
+            self.level(),
             aspect='auto',
             cmap='bone',
             extent=extent,
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datatype.axes import LinearAxes
+from datatype.cache import SpectrogramCache
 from datatype.parser import Parser
 from datatype.settings import Settings
 from gui.explorer import FileExplorer
@@ -80,7 +81,16 @@ class Window(QMainWindow):
             projection='linear'
         )
 
-        self.scrollable = ScrollableWindow(self.figure, self.ax)
+        # Keeping spectrograms on disk is opt-in, up to a limit in bytes
+        path = None
+
+        if self.parser.getboolean('cache', 'disk', fallback=False):
+            path = self.parser.home.joinpath('cache')
+
+        limit = self.parser.getint('cache', 'limit', fallback=2 ** 30)
+        cache = SpectrogramCache(path, limit=limit)
+
+        self.scrollable = ScrollableWindow(self.figure, self.ax, cache)
 
         self.layout.addWidget(self.scrollable)
 
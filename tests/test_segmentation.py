@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import numpy as np
+
+from datatype.segmentation import (
+    DynamicThresholdSegmentation,
+    StreamingSegmentation
+)
+from datatype.settings import Settings
+from datatype.signal import Signal
+from hypothesis import given
+from hypothesis import strategies as st
+from hypothesis.extra.numpy import arrays
+from pathlib import Path
+from scipy import ndimage
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+
+RATE = 44100
+
+SETTINGS = Path(__file__).parent.parent.joinpath(
+    'settings',
+    'spectrogram.json'
+)
+
+THRESHOLD = 0.01
+
+
+def label(signal: npt.NDArray) -> npt.NDArray:
+    # The previous implementation, which scanned the signal for each label
+    signal = signal > THRESHOLD
+    elements, nelements = ndimage.label(signal)
+
+    zero = [0]
+
+    if nelements == 0:
+        return np.array(
+            [zero, zero]
+        )
+
+    onset, offset = np.array(
+        [
+            np.where(elements == element)[0][np.array([0, -1])] +
+            np.array([0, 1])
+            for element in np.unique(elements)
+            if element != 0
+        ]
+    ).T
+
+    return np.array([onset, offset])
+
+
+def tones(seconds: float = 3.0, seed: int = 0) -> npt.NDArray:
+    # A 3 kHz tone every 250 ms over white noise, from the first sample
+    generator = np.random.default_rng(seed)
+    time = np.arange(int(seconds * RATE)) / RATE
+
+    data = 0.01 * generator.standard_normal(len(time))
+
+    for onset in np.arange(0, seconds, 0.25):
+        mask = (time >= onset) & (time < onset + 0.06)
+        data[mask] = data[mask] + 0.5 * np.sin(2 * np.pi * 3000 * time[mask])
+
+    return data.astype('float32')
+
+
+def signal(data: npt.NDArray) -> Signal:
+    signal = Signal()
+    signal.data = data
+    signal.rate = RATE
+
+    return signal
+
+
+def segmentation() -> DynamicThresholdSegmentation:
+    settings = Settings(silence_threshold=THRESHOLD)
+    return DynamicThresholdSegmentation(settings=settings)
+
+
+@given(
+    arrays(
+        np.float64,
+        st.integers(0, 500),
+        elements=st.floats(0, 1)
+    )
+)
+def test_onset_offset_envelope(envelope: npt.NDArray) -> None:
+    expected = label(envelope)
+    result = segmentation()._calculate_onset_offset(envelope)
+
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_equal(result.dtype, expected.dtype)
+
+
+@given(
+    arrays(
+        np.bool_,
+        st.integers(0, 500)
+    )
+)
+def test_onset_offset_mask(mask: npt.NDArray) -> None:
+    expected = label(mask)
+    result = segmentation()._calculate_onset_offset(mask)
+
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_equal(result.dtype, expected.dtype)
+
+
+def test_onset_offset_silence() -> None:
+    result = segmentation()._calculate_onset_offset(np.zeros(100))
+    np.testing.assert_array_equal(result, [[0], [0]])
+
+
+def test_onset_offset_edges() -> None:
+    mask = np.array([1, 1, 0, 0, 1, 0, 1, 1], dtype=bool)
+    result = segmentation()._calculate_onset_offset(mask)
+
+    np.testing.assert_array_equal(result, [[0, 4, 6], [2, 5, 8]])
+
+
+def test_segmentation_stereo() -> None:
+    settings = Settings.from_file(SETTINGS)
+
+    left = tones(seed=0)
+    right = tones(seed=1)
+
+    stereo = signal(np.stack([left, right]))
+    mono = signal(np.mean([left, right], axis=0, dtype='float32'))
+
+    expected = DynamicThresholdSegmentation(mono, settings).start().component
+    result = DynamicThresholdSegmentation(stereo, settings).start().component
+
+    np.testing.assert_array_equal(result['onset'], expected['onset'])
+    np.testing.assert_array_equal(result['offset'], expected['offset'])
+    np.testing.assert_equal(stereo.data.shape, (2, len(left)))
+
+
+def test_segmentation_stereo_streaming() -> None:
+    settings = Settings.from_file(SETTINGS)
+    settings.min_level_db_floor = settings.min_level_db + settings.db_delta
+
+    stereo = np.stack([tones(seed=0), tones(seed=1)])
+
+    batch = DynamicThresholdSegmentation(signal(stereo), settings)
+    streaming = StreamingSegmentation(signal(stereo), settings, size=4096)
+
+    expected = batch.start().component
+    result = streaming.start().component
+
+    np.testing.assert_array_equal(result['onset'], expected['onset'])
+    np.testing.assert_array_equal(result['offset'], expected['offset'])
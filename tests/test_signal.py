@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from datatype.signal import pcm_to_float
+
+
+def left_justify(samples: list[int]) -> np.ndarray:
+    # 24-bit PCM is read by scipy as int32, in the upper three bytes
+    return np.array(samples, dtype='int32') << 8
+
+
+@pytest.mark.parametrize(
+    ('data', 'expected'),
+    [
+        (
+            np.array([0, 64, 128, 255], dtype='uint8'),
+            [-1.0, -0.5, 0.0, 127 / 128]
+        ),
+        (
+            np.array([-32768, -16384, 0, 32767], dtype='int16'),
+            [-1.0, -0.5, 0.0, 32767 / 32768]
+        ),
+        (
+            left_justify([-2 ** 23, -2 ** 22, 0, 2 ** 23 - 1]),
+            [-1.0, -0.5, 0.0, (2 ** 23 - 1) / 2 ** 23]
+        ),
+        (
+            np.array([-2 ** 31, -2 ** 30, 0, 2 ** 31 - 1], dtype='int32'),
+            [-1.0, -0.5, 0.0, (2 ** 31 - 1) / 2 ** 31]
+        ),
+        (
+            np.array([-1.0, -0.5, 0.0, 0.25], dtype='float32'),
+            [-1.0, -0.5, 0.0, 0.25]
+        ),
+        (
+            np.array([-1.0, -0.5, 0.0, 0.25], dtype='float64'),
+            [-1.0, -0.5, 0.0, 0.25]
+        ),
+    ],
+    ids=['uint8', 'int16', 'int24', 'int32', 'float32', 'float64']
+)
+def test_pcm_to_float(data: np.ndarray, expected: list[float]) -> None:
+    result = pcm_to_float(data)
+
+    np.testing.assert_equal(result.dtype, np.float32)
+    np.testing.assert_allclose(result, expected, rtol=1e-7, atol=0)
+
+
+@pytest.mark.parametrize('dtype', ['uint8', 'int16', 'int32', 'float64'])
+def test_pcm_to_float_chunk(dtype: str) -> None:
+    generator = np.random.default_rng(0)
+
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        information = np.iinfo(dtype)
+
+        data = generator.integers(
+            information.min,
+            information.max,
+            size=(2, 10000),
+            dtype=dtype,
+            endpoint=True
+        )
+    else:
+        data = generator.uniform(-1, 1, size=(2, 10000)).astype(dtype)
+
+    out = np.empty(data.shape, dtype='float32')
+
+    # Each chunk is converted into its slice of the preallocated array
+    for start in range(0, data.shape[-1], 1024):
+        end = start + 1024
+
+        result = pcm_to_float(
+            data[..., start:end],
+            out=out[..., start:end]
+        )
+
+        np.testing.assert_equal(np.shares_memory(result, out), True)
+
+    np.testing.assert_array_equal(out, pcm_to_float(data))
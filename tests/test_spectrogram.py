@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from datatype.settings import Settings
+from datatype.spectrogram import mel_matrix
+
+
+@pytest.mark.parametrize(
+    ('n_fft', 'num_mel_bins', 'lower', 'upper', 'sample_rate'),
+    [
+        (512, 64, 1500, 10000, 44100),
+        (1024, 128, 500, 12000, 48000),
+        (256, 32, 0, 8000, 22050),
+        (2048, 80, 300, 20000, 44100),
+    ]
+)
+def test_mel_matrix_tensorflow(
+    n_fft: int,
+    num_mel_bins: int,
+    lower: int,
+    upper: int,
+    sample_rate: int
+) -> None:
+    pytest.importorskip('tensorflow')
+
+    settings = Settings(
+        n_fft=n_fft,
+        num_mel_bins=num_mel_bins,
+        mel_lower_edge_hertz=lower,
+        mel_upper_edge_hertz=upper,
+        sample_rate=sample_rate
+    )
+
+    expected = mel_matrix(settings, tensorflow=True)
+    result = mel_matrix(settings)
+
+    np.testing.assert_equal(result.shape, expected.shape)
+
+    # TensorFlow evaluates the triangles in float32
+    np.testing.assert_allclose(result, expected, rtol=0, atol=5e-5)